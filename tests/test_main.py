@@ -1,3 +1,6 @@
+from collections import defaultdict
+
+import pygame
 import pytest
 
 from conftest import StopInfiniteLoop
@@ -16,3 +19,29 @@ def test_main_run_without_exceptions(_the_snake):
             f'`{type(error).__name__}: {error}`\n\n'
             'Убедитесь, что функция работает корректно.'
         )
+
+
+@pytest.mark.parametrize(
+    'direction, held_keys, expected',
+    (
+        ('UP', ('K_UP', 'K_RIGHT'), 'RIGHT'),
+        ('DOWN', ('K_DOWN', 'K_LEFT'), 'LEFT'),
+        ('RIGHT', ('K_LEFT', 'K_UP'), 'UP'),
+        ('RIGHT', ('K_RIGHT',), None),
+    ),
+)
+def test_handle_keys_held_keys(
+        direction, held_keys, expected, snake, _the_snake, monkeypatch
+):
+    pressed = defaultdict(
+        bool, {getattr(pygame, key): True for key in held_keys}
+    )
+    monkeypatch.setattr(pygame.key, 'get_pressed', lambda: pressed)
+    snake.direction = getattr(_the_snake, direction)
+    snake.next_direction = None
+    _the_snake.handle_keys(snake)
+    expected_direction = getattr(_the_snake, expected) if expected else None
+    assert snake.next_direction == expected_direction, (
+        'Убедитесь, что функция `handle_keys` поворачивает змейку, '
+        'если зажато несколько клавиш управления.'
+    )
@@ -1,5 +1,6 @@
-from random import randint
-from typing import Dict, List, Optional, Tuple
+from collections import deque
+from random import randint, randrange
+from typing import Deque, Dict, List, Optional, Set, Tuple
 
 import pygame
 
@@ -11,6 +12,20 @@ GRID_WIDTH: int = SCREEN_WIDTH // GRID_SIZE
 GRID_HEIGHT: int = SCREEN_HEIGHT // GRID_SIZE
 CENTER_POSITION: Tuple[int, int] = ((SCREEN_WIDTH // 2), (SCREEN_HEIGHT // 2))
 
+CELL_COUNT: int = GRID_WIDTH * GRID_HEIGHT
+
+# Координаты ячеек игрового поля по их номеру (y * GRID_WIDTH + x):
+CELLS: Tuple[Tuple[int, int], ...] = tuple(
+    (x * GRID_SIZE, y * GRID_SIZE)
+    for y in range(GRID_HEIGHT)
+    for x in range(GRID_WIDTH)
+)
+
+# Бит ячейки в битовой маске занятых ячеек:
+CELL_BITS: Dict[Tuple[int, int], int] = {
+    cell: 1 << index for index, cell in enumerate(CELLS)
+}
+
 # Направления движения:
 UP: Tuple[int, int] = (0, -1)
 DOWN: Tuple[int, int] = (0, 1)
@@ -36,6 +51,14 @@ DIRECTIONS: Dict[Tuple[int, Tuple[int, int]], Tuple[int, int]] = {
     (pygame.K_RIGHT, DOWN): RIGHT,
 }
 
+# Смещение головы змейки в пикселях за один шаг для каждого направления
+STEPS: Dict[Tuple[int, int], Tuple[int, int]] = {
+    UP: (0, -GRID_SIZE),
+    DOWN: (0, GRID_SIZE),
+    LEFT: (-GRID_SIZE, 0),
+    RIGHT: (GRID_SIZE, 0),
+}
+
 # Цвет фона - черный:
 BOARD_BACKGROUND_COLOR: Tuple[int, int, int] = (0, 0, 0)
 
@@ -63,6 +86,14 @@ screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), 0, 32)
 # Заголовок окна игрового поля:
 pygame.display.set_caption('Змейка')
 
+# События, которые попадают в очередь:
+HANDLED_EVENTS: Tuple[int, ...] = (pygame.QUIT, pygame.VIDEOEXPOSE)
+
+# Клавиши управления змейкой:
+DIRECTION_KEYS: Tuple[int, ...] = (
+    pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT
+)
+
 # Настройка времени:
 clock = pygame.time.Clock()
 
@@ -76,21 +107,43 @@ class GameObject:
     Attributes:
         position (tuple): Координаты объекта на игровом поле (x, y)
         body_color (tuple): Цвет объекта в формате RGB
+        surface (pygame.Surface): Заранее отрисованное изображение объекта
     """
 
     def __init__(self, body_color=None) -> None:
         self.position: Tuple[int, int] = CENTER_POSITION
         self.body_color: Tuple[int, int, int] = body_color
+        self.surface: Optional[pygame.Surface] = (
+            self.create_surface() if body_color else None
+        )
 
-    def draw(self) -> None:
-        """Отрисовывает объект на экране.
+    def create_surface(self) -> pygame.Surface:
+        """Создает изображение объекта размером в одну ячейку.
 
         Рисует квадрат с заливкой основным цветом и границей.
         Может быть переопределен в дочерних классах
         """
-        rect = pygame.Rect(self.position, (GRID_SIZE, GRID_SIZE))
-        pygame.draw.rect(screen, self.body_color, rect)
-        pygame.draw.rect(screen, BORDER_COLOR, rect, 1)
+        surface = pygame.Surface((GRID_SIZE, GRID_SIZE))
+        surface.fill(self.body_color)
+        pygame.draw.rect(surface, BORDER_COLOR, surface.get_rect(), 1)
+        return surface.convert()
+
+    def draw(self) -> List[pygame.Rect]:
+        """Отрисовывает объект на экране.
+
+        Копирует заранее подготовленное изображение объекта на его позицию.
+        Возвращает список измененных областей экрана.
+        """
+        return [screen.blit(self.surface, self.position)]
+
+    def erase(self) -> List[pygame.Rect]:
+        """Затирает устаревшее изображение объекта на экране.
+
+        Вызывается для всех объектов до их отрисовки, чтобы затирание
+        не перекрыло уже нарисованные объекты. Неподвижным объектам
+        затирать нечего. Возвращает список измененных областей экрана.
+        """
+        return []
 
 
 class Apple(GameObject):
@@ -101,37 +154,52 @@ class Apple(GameObject):
 
     Attributes:
         body_color (tuple): Цвет яблока (красный по умолчанию)
+        prev_position (tuple): Позиция, на которой яблоко отрисовано сейчас
     """
 
     def __init__(
             self,
             body_color: Tuple[int, int, int] = APPLE_COLOR,
-            occupied: Optional[List[Tuple[int, int]]] = None
+            occupied: Optional[int] = None
     ) -> None:
         super().__init__(body_color)
         self.randomize_position(occupied)
+        self.prev_position: Tuple[int, int] = self.position
 
     def randomize_position(
             self,
-            occupied: Optional[List[Tuple[int, int]]] = None
+            occupied: Optional[int] = None
     ) -> None:
         """Устанавливает случайное положение яблока на экране.
 
-        Подбирает случайные координаты для положения яблока на экране.
-        Гарантирует, что яблоко не появится на занятых позициях.
+        Подбирает случайные ячейки, пока не найдет свободную
+        в битовой маске занятых ячеек occupied.
+        Если свободных ячеек не осталось, яблоко остается на месте.
         """
         if occupied is None:
-            occupied = [CENTER_POSITION]
+            occupied = CELL_BITS[CENTER_POSITION]
+
+        if bin(occupied).count('1') >= CELL_COUNT:
+            return
 
         while True:
-            new_position = (
-                randint(0, GRID_WIDTH - 1) * GRID_SIZE,
-                randint(0, GRID_HEIGHT - 1) * GRID_SIZE
-            )
-            if new_position not in occupied:
-                self.position = new_position
+            index = randrange(CELL_COUNT)
+            if not occupied >> index & 1:
+                self.position = CELLS[index]
                 break
 
+    def erase(self) -> List[pygame.Rect]:
+        """Затирает прежнюю позицию яблока, если оно переместилось."""
+        if self.prev_position == self.position:
+            return []
+
+        rect = screen.fill(
+            BOARD_BACKGROUND_COLOR,
+            (self.prev_position, (GRID_SIZE, GRID_SIZE))
+        )
+        self.prev_position = self.position
+        return [rect]
+
 
 class Snake(GameObject):
     """Змейка в игре.
@@ -141,19 +209,30 @@ class Snake(GameObject):
 
     Attributes:
         length (int): Текущая длина змейки
-        positions (list): Список координат всех сегментов змейки
+        positions (deque): Очередь координат всех сегментов змейки
+        body_positions (set): Координаты всех сегментов, кроме головы
+        occupied_mask (int): Битовая маска занятых змейкой ячеек
+        rects (deque): Области экрана сегментов в том же порядке, что positions
         direction (tuple): Текущее направление движения
         next_direction (tuple): Следующее направление движения
-        last (tuple): Координаты последнего удаленного сегмента
+        last (list): Области экрана удаленных на последнем шаге сегментов
+        erase_surface (pygame.Surface): Ячейка цвета фона для затирания
     """
 
     def __init__(self, body_color: Tuple[int, int, int] = SNAKE_COLOR) -> None:
         super().__init__(body_color)
+        self.erase_surface: pygame.Surface = pygame.Surface(
+            (GRID_SIZE, GRID_SIZE)
+        ).convert()
+        self.erase_surface.fill(BOARD_BACKGROUND_COLOR)
         self.length: int
-        self.positions: List[Tuple[int, int]]
+        self.positions: Deque[Tuple[int, int]]
+        self.body_positions: Set[Tuple[int, int]]
+        self.occupied_mask: int
+        self.rects: Deque[pygame.Rect] = deque()
         self.direction: Tuple[int, int]
         self.next_direction: Optional[Tuple[int, int]]
-        self.last: List[Tuple[int, int]]
+        self.last: List[pygame.Rect] = []
         self.reset()
 
     def update_direction(self) -> None:
@@ -165,55 +244,77 @@ class Snake(GameObject):
     def move(self) -> None:
         """Перемещает змейку в текущем направлении.
 
-        Вычисляет новую позицию головы, добавляет её в начало списка позиций
+        Вычисляет новую позицию головы, добавляет её в начало очереди позиций
         Удаляет лишние сегменты в соответствии с текущей длиной змейки.
         """
         head_x, head_y = self.get_head_position()
-        dir_x, dir_y = self.direction
-        new_x = (head_x + dir_x * GRID_SIZE) % SCREEN_WIDTH
-        new_y = (head_y + dir_y * GRID_SIZE) % SCREEN_HEIGHT
-        self.positions.insert(0, (new_x, new_y))
+        step_x, step_y = STEPS[self.direction]
+        new_x = head_x + step_x
+        new_y = head_y + step_y
+
+        # Голова смещается не больше чем на одну ячейку,
+        # поэтому для перехода через край поля достаточно одного сравнения.
+        if new_x < 0:
+            new_x += SCREEN_WIDTH
+        elif new_x >= SCREEN_WIDTH:
+            new_x -= SCREEN_WIDTH
+        if new_y < 0:
+            new_y += SCREEN_HEIGHT
+        elif new_y >= SCREEN_HEIGHT:
+            new_y -= SCREEN_HEIGHT
+        self.body_positions.add((head_x, head_y))
+        self.positions.appendleft((new_x, new_y))
+        self.rects.appendleft(pygame.Rect(new_x, new_y, GRID_SIZE, GRID_SIZE))
 
         self.last = []
         while len(self.positions) > self.length:
-            self.last.append(self.positions.pop())
-
-    def draw(self) -> None:
+            tail = self.positions.pop()
+            self.body_positions.discard(tail)
+            self.occupied_mask &= ~CELL_BITS[tail]
+            self.last.append(self.rects.pop())
+        # Голова может занять только что освобожденную хвостом ячейку
+        self.occupied_mask |= CELL_BITS[new_x, new_y]
+
+    def draw(self) -> List[pygame.Rect]:
         """Отрисовывает змейку на игровом поле.
 
-        Рисует все сегменты змейки с заливкой и границей,
-        а также затирает последний удаленный сегмент.
+        Рисует только новую голову: остальные сегменты остались
+        на экране с прошлых кадров.
+        Возвращает список измененных областей экрана.
         """
-        for position in self.positions[:-1]:
-            rect = (pygame.Rect(position, (GRID_SIZE, GRID_SIZE)))
-            pygame.draw.rect(screen, self.body_color, rect)
-            pygame.draw.rect(screen, BORDER_COLOR, rect, 1)
-
-        head_rect = pygame.Rect(
-            self.get_head_position(), (GRID_SIZE, GRID_SIZE)
+        head_rect = self.rects[0]
+        screen.blit(self.surface, head_rect)
+        return [head_rect]
+
+    def erase(self) -> List[pygame.Rect]:
+        """Затирает сегменты, удаленные на последнем шаге или при сбросе."""
+        screen.blits(
+            [(self.erase_surface, rect) for rect in self.last],
+            doreturn=False,
         )
-        pygame.draw.rect(screen, self.body_color, head_rect)
-        pygame.draw.rect(screen, BORDER_COLOR, head_rect, 1)
-
-        for position in self.last:
-            pygame.draw.rect(
-                screen,
-                BOARD_BACKGROUND_COLOR,
-                pygame.Rect(position, (GRID_SIZE, GRID_SIZE))
-            )
+        return self.last
 
     def change_length(self, delta: int) -> None:
         """Изменяет длину змейки на указанное значение."""
         self.length = max(1, self.length + delta)
 
     def reset(self) -> None:
-        """Сбрасывает змейку в случайную начальную позицию"""
+        """Сбрасывает змейку в случайную начальную позицию
+
+        Прежние сегменты затираются при следующей отрисовке.
+        """
         self.length = 1
+        self.last.extend(self.rects)
 
-        self.positions = [(
+        self.positions = deque([(
             randint(0, GRID_WIDTH - 1) * GRID_SIZE,
             randint(0, GRID_HEIGHT - 1) * GRID_SIZE,
-        )]
+        )])
+        self.body_positions = set()
+        self.occupied_mask = CELL_BITS[self.get_head_position()]
+        self.rects = deque([
+            pygame.Rect(self.get_head_position(), (GRID_SIZE, GRID_SIZE))
+        ])
         self.direction = RIGHT
         self.next_direction = None
 
@@ -226,7 +327,7 @@ class Snake(GameObject):
         if obj:
             return self.get_head_position() == obj.position
         else:
-            return self.get_head_position() in self.positions[1:]
+            return self.get_head_position() in self.body_positions
 
 
 class Rock(GameObject):
@@ -272,68 +373,89 @@ class Poison(GameObject):
             randint(0, GRID_HEIGHT - 1) * GRID_SIZE
         )
 
-    def draw(self) -> None:
-        """Отрисовывает несъедобный корм на игровом поле."""
-        x, y = self.position
+    def create_surface(self) -> pygame.Surface:
+        """Создает изображение несъедобного корма в виде треугольника."""
+        surface = pygame.Surface((GRID_SIZE, GRID_SIZE), pygame.SRCALPHA)
         points = [
-            (x + GRID_SIZE // 2, y),
-            (x, y + GRID_SIZE),
-            (x + GRID_SIZE, y + GRID_SIZE)
+            (GRID_SIZE // 2, 0),
+            (0, GRID_SIZE - 1),
+            (GRID_SIZE - 1, GRID_SIZE - 1)
         ]
-        pygame.draw.polygon(screen, self.body_color, points)
-        pygame.draw.polygon(screen, BORDER_COLOR, points, 1)
+        pygame.draw.polygon(surface, self.body_color, points)
+        pygame.draw.polygon(surface, BORDER_COLOR, points, 1)
+        return surface.convert_alpha()
 
 
 def handle_keys(game_object: 'Snake') -> None:
-    """Функция обработки действий пользователя"""
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            raise SystemExit
+    """Функция обработки действий пользователя
 
-        if event.type == pygame.KEYDOWN:
-            new_direction = DIRECTIONS.get(
-                (event.key, game_object.direction),
-                game_object.direction,
-            )
-            game_object.next_direction = new_direction
+    Очередь событий проверяется только на выход из игры,
+    направление определяется по состоянию клавиш управления.
+    """
+    if pygame.event.peek(pygame.QUIT):
+        pygame.quit()
+        raise SystemExit
+
+    pressed = pygame.key.get_pressed()
+    for key in DIRECTION_KEYS:
+        if pressed[key]:
+            new_direction = DIRECTIONS.get((key, game_object.direction))
+            if new_direction and new_direction != game_object.direction:
+                game_object.next_direction = new_direction
+                break
 
 
 def main() -> None:
     """Запускает игру"""
     pygame.init()
+    # Остальные события не попадают в очередь
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(HANDLED_EVENTS)
 
     apple = Apple()
     snake = Snake()
     rock = Rock()
     poison = Poison()
+    obstacles = CELL_BITS[rock.position] | CELL_BITS[poison.position]
+    # Порядок отрисовки: змейка поверх яблока, камень и корм поверх змейки
+    game_objects = (apple, snake, rock, poison)
     screen.fill(BOARD_BACKGROUND_COLOR)
-    apple.randomize_position(snake.positions)
+    apple.randomize_position(snake.occupied_mask | obstacles)
+    dirty_rects: List[pygame.Rect] = [screen.get_rect()]
 
     while True:
         clock.tick(SPEED)
 
         handle_keys(snake)
+        # Окно было перекрыто: его содержимое нужно обновить целиком
+        if pygame.event.get(pygame.VIDEOEXPOSE):
+            dirty_rects.append(screen.get_rect())
         snake.update_direction()
         snake.move()
 
-        if snake.check_collision(apple):
-            snake.change_length(1)
-            apple.randomize_position(snake.positions)
+        # Объект в ячейке головы, камень важнее совпавшего с ним корма
+        hit = {
+            apple.position: apple,
+            poison.position: poison,
+            rock.position: rock,
+        }.get(snake.get_head_position())
 
-        if snake.check_collision(poison):
+        if hit is apple:
+            snake.change_length(1)
+            apple.randomize_position(snake.occupied_mask | obstacles)
+        elif hit is poison:
             snake.change_length(-1)
 
-        if snake.check_collision() or snake.check_collision(rock):
-            screen.fill(BOARD_BACKGROUND_COLOR)
+        if hit is rock or snake.check_collision():
             snake.reset()
-            apple.randomize_position(snake.positions)
-
-        apple.draw()
-        snake.draw()
-        rock.draw()
-        poison.draw()
-        pygame.display.update()
+            apple.randomize_position(snake.occupied_mask | obstacles)
+
+        for game_object in game_objects:
+            dirty_rects += game_object.erase()
+        for game_object in game_objects:
+            dirty_rects += game_object.draw()
+        pygame.display.update(dirty_rects)
+        dirty_rects.clear()
 
 
 if __name__ == '__main__':